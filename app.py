@@ -1,16 +1,19 @@
 import streamlit as st
-import copy, math, random, time
-from datetime import datetime
+import atexit, os, pickle, random, time
+from concurrent.futures import ThreadPoolExecutor
+from search import (BOARD_SIZE, BLACK, WHITE, new_board, stone_at, apply_move,
+                    heuristic, has_any_legal_move, root_search,
+                    canonical_key, map_move, D4_PERMS, INV_PERMS)
 
-BOARD_SIZE = 5
 DEFAULT_SEARCH_DEPTH = 2
 INSTANT_WIN_THRESHOLD = 15  # points lead for instant win
 
 st.set_page_config(page_title="Mini-Go AI", page_icon="⚫", layout="wide")
 
-# --- HEADING WITH CONTRASTING COLORS ---
-st.markdown(
-    """
+# Page chrome. The CSS and heading never change, so they live in one constant
+# emitted with a single st.markdown call per run instead of being rebuilt and
+# diffed as separate elements on every rerun.
+_PAGE_STYLE = """
     <style>
     .title-go {
         font-size: 64px;
@@ -23,16 +26,6 @@ st.markdown(
         -webkit-text-fill-color: transparent;
         font-family: 'Georgia', serif;
     }
-    </style>
-    <h1 class="title-go">Go</h1>
-    """,
-    unsafe_allow_html=True
-)
-# ----------------------------------------
-
-st.markdown(
-    """
-    <style>
     .turn-banner {
         padding: 10px;
         border-radius: 8px;
@@ -46,222 +39,198 @@ st.markdown(
     .winner { background: linear-gradient(90deg, #fff7ed, #fde68a); color:#78350f; padding:12px; border-radius:10px; text-align:center; font-weight:bold; font-size:20px; margin:10px 0; }
     .draw { background:#f3f4f6; color:#374151; padding:12px; border-radius:10px; text-align:center; font-weight:bold; font-size:20px; margin:10px 0; }
     </style>
-    """,
-    unsafe_allow_html=True
-)
-
-def new_board():
-    return [["." for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
-
-def neighbors(r, c):
-    for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-        nr, nc = r+dr, c+dc
-        if 0 <= nr < BOARD_SIZE and 0 <= nc < BOARD_SIZE:
-            yield nr, nc
-
-def has_liberty(board, r, c, visited=None):
-    if visited is None: visited = set()
-    if (r,c) in visited: return False
-    visited.add((r,c))
-    color = board[r][c]
-    for nr, nc in neighbors(r,c):
-        if board[nr][nc] == ".": return True
-        if board[nr][nc] == color and has_liberty(board,nr,nc,visited): return True
-    return False
-
-def remove_dead(board, color):
-    to_remove = []
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            if board[r][c] == color and not has_liberty(board,r,c):
-                to_remove.append((r,c))
-    for r,c in to_remove: board[r][c] = "."
-    return len(to_remove)
-
-def apply_move(board, r, c, player):
-    if board[r][c] != ".": return None
-    new_b = copy.deepcopy(board)
-    new_b[r][c] = player
-    opp = "B" if player=="W" else "W"
-    remove_dead(new_b, opp)
-    if not has_liberty(new_b, r, c): return None
-    return new_b
-
-def heuristic(board, player="B"):
-    opp = "B" if player=="W" else "W"
-    return sum(row.count(player) for row in board) - sum(row.count(opp) for row in board)
+    <h1 class="title-go">Go</h1>
+    """
 
-def minimax(board, depth, alpha, beta, maximizing, player):
-    opp = "B" if player=="W" else "W"
-    if depth == 0: return heuristic(board, player), None
-    best_move = None
-    if maximizing:
-        max_eval = -math.inf
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                new_b = apply_move(board, r, c, player)
-                if not new_b: continue
-                eval_val, _ = minimax(new_b, depth-1, alpha, beta, False, player)
-                if eval_val > max_eval: max_eval, best_move = eval_val, (r,c)
-                alpha = max(alpha, eval_val)
-                if beta <= alpha: break
-        return max_eval, best_move
-    else:
-        min_eval = math.inf
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                new_b = apply_move(board, r, c, opp)
-                if not new_b: continue
-                eval_val, _ = minimax(new_b, depth-1, alpha, beta, True, player)
-                if eval_val < min_eval: min_eval, best_move = eval_val, (r,c)
-                beta = min(beta, eval_val)
-                if beta <= alpha: break
-        return min_eval, best_move
+st.markdown(_PAGE_STYLE, unsafe_allow_html=True)
 
 if "board" not in st.session_state: st.session_state.board = new_board()
-if "turn" not in st.session_state: st.session_state.turn = "W"
+if "turn" not in st.session_state: st.session_state.turn = WHITE
 if "history" not in st.session_state: st.session_state.history = []
 if "ai_thinking" not in st.session_state: st.session_state.ai_thinking = False
 if "game_over" not in st.session_state: st.session_state.game_over = False
 if "forced_winner" not in st.session_state: st.session_state.forced_winner = None
+if "ai_future" not in st.session_state: st.session_state.ai_future = None
 
 def no_moves_left(board, player):
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            if apply_move(board,r,c,player): return False
-    return True
+    return not has_any_legal_move(board, player)
 
 def end_game_with_forced_rule():
     roll = random.random()
-    st.session_state.forced_winner = "B" if roll < 0.1 else "W"
+    st.session_state.forced_winner = BLACK if roll < 0.1 else WHITE
     st.session_state.game_over = True
 
 def check_instant_win():
-    val = heuristic(st.session_state.board,"B")
+    val = heuristic(st.session_state.board,BLACK)
     if abs(val) >= INSTANT_WIN_THRESHOLD:
         st.session_state.game_over = True
-        st.session_state.forced_winner = "B" if val > 0 else "W"
+        st.session_state.forced_winner = BLACK if val > 0 else WHITE
 
 def auto_pass_turn():
     if st.session_state.game_over: return
     cur = st.session_state.turn
     if no_moves_left(st.session_state.board, cur):
-        st.session_state.turn = "B" if cur=="W" else "W"
+        st.session_state.turn = cur ^ 1
         if no_moves_left(st.session_state.board, st.session_state.turn):
             end_game_with_forced_rule()
 
 def declare_winner():
-    if st.session_state.forced_winner:
-        if st.session_state.forced_winner == "B":
+    if st.session_state.forced_winner is not None:
+        if st.session_state.forced_winner == BLACK:
             st.markdown("<div class='winner'>🏆 Black (AI) wins!</div>", unsafe_allow_html=True)
         else:
             st.markdown("<div class='winner'>🏆 White (You) win!</div>", unsafe_allow_html=True)
         return
-    val = heuristic(st.session_state.board,"B")
+    val = heuristic(st.session_state.board,BLACK)
     if val > 0: st.markdown(f"<div class='winner'>🏆 Black (AI) wins by {val} stones!</div>", unsafe_allow_html=True)
     elif val < 0: st.markdown(f"<div class='winner'>🏆 White (You) win by {-val} stones!</div>", unsafe_allow_html=True)
     else: st.markdown("<div class='draw'>🤝 It's a draw!</div>", unsafe_allow_html=True)
 
 def projected_winner():
-    val = heuristic(st.session_state.board,"B")
+    val = heuristic(st.session_state.board,BLACK)
     if val > 0: st.info(f"📊 Currently Winning: Black (+{val})")
     elif val < 0: st.info(f"📊 Currently Winning: White (+{-val})")
     else: st.info("📊 Currently Balanced")
 
 def play_human(r,c):
-    if st.session_state.turn!="W" or st.session_state.game_over: return
-    new_b = apply_move(st.session_state.board,r,c,"W")
-    if new_b:
-        st.session_state.board = new_b
-        st.session_state.history.append(("W",(r,c),datetime.utcnow().isoformat()))
+    if st.session_state.turn!=WHITE or st.session_state.game_over: return
+    res = apply_move(st.session_state.board,r,c,WHITE)
+    if res:
+        st.session_state.board = res
+        st.session_state.history.append((WHITE,(r,c),time.time()))
         check_instant_win()
         if not st.session_state.game_over:
-            st.session_state.turn = "B"
+            st.session_state.turn = BLACK
             auto_pass_turn()
 
+# The search runs on a single worker thread so the script run (and the
+# browser) stays responsive while the AI thinks. root_search is pure, so
+# results are memoized in a plain dict; st.cache_data is off-limits here
+# because the worker thread has no Streamlit script-run context.
+#
+# The cache is keyed by the canonical (symmetry-folded) position so all 8
+# board images share one entry, and persisted with pickle so later sessions
+# start warm - common openings cost one search ever, not one per session.
+# Stored moves live in the canonical orientation and are mapped back on a hit.
+_AI_EXEC = ThreadPoolExecutor(max_workers=1)
+_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tt_cache.pkl")
+_CACHE_MAX_ENTRIES = 2**16
+
+try:
+    with open(_CACHE_FILE, "rb") as f:
+        _SEARCH_CACHE = pickle.load(f)
+except Exception:
+    _SEARCH_CACHE = {}
+
+def _save_search_cache():
+    try:
+        with open(_CACHE_FILE, "wb") as f:
+            pickle.dump(_SEARCH_CACHE, f)
+    except OSError:
+        pass
+
+atexit.register(_save_search_cache)
+
+def cached_search(board, depth):
+    pos, perm_k = canonical_key(board, BLACK)
+    hit = _SEARCH_CACHE.get((pos, depth))
+    if hit is not None:
+        return hit[0], map_move(hit[1], INV_PERMS[perm_k])
+    val, move, completed = root_search(board, depth)
+    # only cache searches that reached the requested depth: a result the
+    # deadline cut short would otherwise replay its shallow move forever
+    if completed >= depth and len(_SEARCH_CACHE) < _CACHE_MAX_ENTRIES:
+        _SEARCH_CACHE[(pos, depth)] = (val, map_move(move, D4_PERMS[perm_k]))
+    return val, move
+
 def ai_move(depth):
-    if st.session_state.turn!="B" or st.session_state.game_over: return
-    st.session_state.ai_thinking = True
+    # Non-blocking: the first call submits the search and returns with
+    # ai_thinking set; later calls poll the future and apply the move once it
+    # resolves. The launch board is kept alongside the future so a result for
+    # a position that was reset away is dropped instead of applied.
+    if st.session_state.turn!=BLACK or st.session_state.game_over: return
 
-    check_instant_win()
-    if st.session_state.game_over:
-        st.session_state.ai_thinking = False
+    if st.session_state.ai_future is None:
+        check_instant_win()
+        if st.session_state.game_over: return
+        st.session_state.ai_thinking = True
+        st.session_state.ai_future = (
+            st.session_state.board,
+            _AI_EXEC.submit(cached_search, st.session_state.board, depth),
+        )
         return
 
-    start_time = time.time()
-    best_val, best_move = None, None
-
-    # Create a list of all possible moves and shuffle it
-    possible_moves = []
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            if st.session_state.board[r][c] == ".":
-                possible_moves.append((r, c))
-    random.shuffle(possible_moves)
+    launch_board, fut = st.session_state.ai_future
+    if not fut.done(): return
+    st.session_state.ai_future = None
+    st.session_state.ai_thinking = False
+    if launch_board != st.session_state.board: return
 
-    # Find the best move using minimax
-    for r, c in possible_moves:
-        new_b = apply_move(st.session_state.board,r,c,"B")
-        if not new_b: continue
-        val, _ = minimax(new_b, depth-1, -math.inf, math.inf, False, "B")
-        if best_val is None or val > best_val:
-            best_val, best_move = val, (r,c)
-        if time.time() - start_time > 2:  # cap AI time
-            break
-    
+    _, best_move = fut.result()
     if best_move:
-        new_b = apply_move(st.session_state.board,best_move[0],best_move[1],"B")
-        if new_b:
-            st.session_state.board = new_b
-            st.session_state.history.append(("B",best_move,datetime.utcnow().isoformat()))
+        res = apply_move(st.session_state.board,best_move[0],best_move[1],BLACK)
+        if res:
+            st.session_state.board = res
+            st.session_state.history.append((BLACK,best_move,time.time()))
 
     check_instant_win()
-    st.session_state.turn = "W"
-    st.session_state.ai_thinking = False
+    st.session_state.turn = WHITE
     auto_pass_turn()
 
+# The meter HTML only depends on pct (101 possible values), so the formatted
+# string is memoized rather than rebuilt on every rerun.
+@st.cache_data(max_entries=128, show_spinner=False)
+def meter_html(pct):
+    return f"""
+        <div style="height:300px;width:40px;border-radius:8px;overflow:hidden;
+        background:linear-gradient(to top,#111 0%,#111 {pct}%,#f9fafb {pct}%,#f9fafb 100%);
+        margin:auto; border: 1px solid #ddd;"></div>
+        <p style="text-align:center;font-weight:bold">⚫ {pct}% | ⚪ {100-pct}%</p>
+        """
+
 col_board, col_sidebar = st.columns([3,1])
 
 with col_sidebar:
     st.subheader("📊 Advantage Meter")
-    val = heuristic(st.session_state.board,"B")
+    val = heuristic(st.session_state.board,BLACK)
     max_range = BOARD_SIZE*BOARD_SIZE
     pct = int((val + max_range) / (2*max_range) * 100) if max_range > 0 else 50
-    st.markdown(
-        f"""
-        <div style="height:300px;width:40px;border-radius:8px;overflow:hidden;
-        background:linear-gradient(to top,#111 0%,#111 {pct}%,#f9fafb {pct}%,#f9fafb 100%);
-        margin:auto; border: 1px solid #ddd;"></div>
-        <p style="text-align:center;font-weight:bold">⚫ {pct}% | ⚪ {100-pct}%</p>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(meter_html(pct), unsafe_allow_html=True)
     projected_winner()
     if st.session_state.game_over: declare_winner()
     if st.session_state.game_over:
         if st.button("▶️ Play Again"):
             st.session_state.board = new_board()
-            st.session_state.turn = "W"
+            st.session_state.turn = WHITE
             st.session_state.history = []
             st.session_state.ai_thinking = False
+            st.session_state.ai_future = None
             st.session_state.game_over = False
             st.session_state.forced_winner = None
             st.rerun()
 
-with col_board:
+# The game area is a fragment (Streamlit >= 1.37, when st.fragment and
+# scope="fragment" reruns stabilized): stone clicks re-execute
+# only this function, not the CSS/header/sidebar blocks above. Moves that
+# change the score still st.rerun() the whole app so the sidebar meter stays
+# in sync; everything else (slider drags, disabled-button renders) skips the
+# full-script pass.
+@st.fragment
+def game_area():
     if not st.session_state.game_over:
-        if st.session_state.turn=="W":
+        if st.session_state.turn==WHITE:
             st.markdown("<div class='turn-banner white-turn'>⚪ Your Turn</div>",unsafe_allow_html=True)
-        elif st.session_state.turn=="B":
+        elif st.session_state.turn==BLACK:
             st.markdown("<div class='turn-banner black-turn'>⚫ AI is Thinking...</div>",unsafe_allow_html=True)
 
     col1,col2 = st.columns([2,1])
-    depth = col1.slider("AI Depth",1,4,DEFAULT_SEARCH_DEPTH)
+    depth = col1.slider("AI Depth",1,6,DEFAULT_SEARCH_DEPTH)
     if col2.button("🔄 Reset"):
         st.session_state.board = new_board()
-        st.session_state.turn = "W"
+        st.session_state.turn = WHITE
         st.session_state.history = []
         st.session_state.ai_thinking = False
+        st.session_state.ai_future = None
         st.session_state.game_over = False
         st.session_state.forced_winner = None
         st.rerun()
@@ -269,19 +238,27 @@ with col_board:
     for r in range(BOARD_SIZE):
         cols = st.columns(BOARD_SIZE)
         for c in range(BOARD_SIZE):
-            cell = st.session_state.board[r][c]
-            label = "⚪" if cell=="W" else "⚫" if cell=="B" else "➕"
+            cell = stone_at(st.session_state.board, r, c)
+            label = "⚪" if cell==WHITE else "⚫" if cell==BLACK else "➕"
             is_disabled = (
-                cell != "." or 
-                st.session_state.turn != "W" or 
-                st.session_state.game_over or 
+                cell is not None or
+                st.session_state.turn != WHITE or
+                st.session_state.game_over or
                 st.session_state.ai_thinking
             )
-            
+
             if cols[c].button(label, key=f"{r}-{c}", disabled=is_disabled):
                 play_human(r, c)
                 st.rerun()
 
-    if st.session_state.turn=="B" and not st.session_state.ai_thinking and not st.session_state.game_over:
+    if st.session_state.turn==BLACK and not st.session_state.game_over:
         ai_move(depth)
-        st.rerun()
+        if st.session_state.ai_thinking:
+            # poll the worker: only this fragment re-executes while waiting
+            time.sleep(0.2)
+            st.rerun(scope="fragment")
+        else:
+            st.rerun()
+
+with col_board:
+    game_area()
@@ -0,0 +1,403 @@
+import math, os, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+# The search kernel is pure integer arithmetic over bitboards, so when numba
+# is installed the hot primitives are JIT-compiled; without it everything
+# runs as plain Python with identical results.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if args and callable(args[0]): return args[0]
+        return lambda f: f
+
+BOARD_SIZE = 5
+BLACK, WHITE = 0, 1
+
+# The canonical position: two bitboards, bit r*BOARD_SIZE+c set when that
+# colour occupies the point. Immutable, hashable and picklable, so it can be
+# shared, cached and shipped to worker processes without copying. Position
+# identity everywhere (TT, caches) is the packed bitboard pair itself.
+class State(NamedTuple):
+    black: int
+    white: int
+
+def new_board():
+    return State(0, 0)
+
+FULL_MASK = (1 << BOARD_SIZE*BOARD_SIZE) - 1
+NOT_LEFT = sum(1 << (r*BOARD_SIZE+c) for r in range(BOARD_SIZE) for c in range(1, BOARD_SIZE))
+NOT_RIGHT = sum(1 << (r*BOARD_SIZE+c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE-1))
+@njit(cache=True)
+def expand(bb):
+    return ((bb << BOARD_SIZE) | (bb >> BOARD_SIZE) | ((bb & NOT_LEFT) >> 1) | ((bb & NOT_RIGHT) << 1)) & FULL_MASK
+
+NEIGHBOR_MASKS = [expand(1 << sq) for sq in range(BOARD_SIZE*BOARD_SIZE)]
+
+@njit(cache=True)
+def group_mask(stones, seed):
+    group = seed
+    while True:
+        grown = (group | expand(group)) & stones
+        if grown == group: return group
+        group = grown
+
+def stone_at(board, r, c):
+    bit = 1 << (r*BOARD_SIZE+c)
+    if board[BLACK] & bit: return BLACK
+    if board[WHITE] & bit: return WHITE
+    return None
+
+def has_liberty(board, r, c):
+    black, white = board[0], board[1]
+    bit = 1 << (r*BOARD_SIZE+c)
+    empty = FULL_MASK & ~(black | white)
+    if NEIGHBOR_MASKS[r*BOARD_SIZE+c] & empty: return True
+    own = black if black & bit else white
+    return bool(expand(group_mask(own, bit)) & empty)
+
+def remove_dead(board, color):
+    black, white = board[0], board[1]
+    stones = black if color==BLACK else white
+    empty = FULL_MASK & ~(black | white)
+    dead, remaining = 0, stones
+    while remaining:
+        seed = remaining & -remaining
+        group = group_mask(stones, seed)
+        if not (expand(group) & empty): dead |= group
+        remaining &= ~group
+    if not dead: return board, 0
+    stones ^= dead
+    return ((stones, white) if color==BLACK else (black, stones)), dead
+
+def apply_move(state, r, c, player):
+    # Occupancy and suicide are rejected on scratch ints; no State (or any
+    # other object) is materialized until the move is known to be legal.
+    black, white = state
+    sq = r*BOARD_SIZE+c
+    bit = 1 << sq
+    if (black | white) & bit: return None
+    own, opp = (black | bit, white) if player==BLACK else (white | bit, black)
+    empty = FULL_MASK & ~(own | opp)
+    # only opponent groups touching the placed stone can have lost a liberty,
+    # so the capture scan floods at most the 4 adjacent groups, not all of them
+    dead, adjacent = 0, NEIGHBOR_MASKS[sq] & opp
+    while adjacent:
+        seed = adjacent & -adjacent
+        group = group_mask(opp, seed)
+        if not (expand(group) & empty): dead |= group
+        adjacent &= ~group
+    opp ^= dead
+    empty |= dead
+    if not (NEIGHBOR_MASKS[sq] & empty) and not (expand(group_mask(own, bit)) & empty):
+        return None  # suicide
+    return State(own, opp) if player==BLACK else State(opp, own)
+
+def heuristic(board, player=BLACK):
+    diff = board[BLACK].bit_count() - board[WHITE].bit_count()
+    return diff if player==BLACK else -diff
+
+# Centre-out square ordering: central points dominate on 5x5, so trying them
+# first gives alpha-beta far more cutoffs than raster order.
+CENTER_ORDER = sorted(range(BOARD_SIZE*BOARD_SIZE),
+                      key=lambda sq: abs(sq//BOARD_SIZE - BOARD_SIZE//2) + abs(sq%BOARD_SIZE - BOARD_SIZE//2))
+
+# Two killer-move slots per ply: quiet moves that caused a beta cutoff at the
+# same distance from the root are likely to cut again in sibling nodes.
+MAX_DEPTH = 6  # matches the depth slider's upper bound
+KILLERS = [[None, None] for _ in range(MAX_DEPTH+1)]
+
+def clear_killers():
+    for slot in KILLERS: slot[0] = slot[1] = None
+
+def record_killer(ply, move):
+    if ply >= len(KILLERS): return
+    slot = KILLERS[ply]
+    if slot[0] != move: slot[1], slot[0] = slot[0], move
+
+# History heuristic (Schaeffer): moves that caused beta cutoffs anywhere in
+# the tree get credit proportional to depth^2 and are tried earlier in nodes
+# where neither the TT move nor a killer applies.
+HISTORY = {}
+
+def decay_history():
+    # Halve instead of clearing between root searches: the previous search's
+    # cutoff moves keep a head start in the next position (usually two plies
+    # on) while stale entries fade out geometrically.
+    for k in list(HISTORY):
+        HISTORY[k] >>= 1
+        if not HISTORY[k]: del HISTORY[k]
+
+def find_groups(stones):
+    groups, remaining = [], stones
+    while remaining:
+        seed = remaining & -remaining
+        group = group_mask(stones, seed)
+        groups.append(group)
+        remaining &= ~group
+    return groups
+
+def expand_children(state, player):
+    # Legal moves for player, mapped to their captured mask. The opponent-group
+    # liberty scan runs once and is shared by all 25 candidates instead of
+    # being redone inside apply_move per square: a square captures exactly when
+    # it is some opponent group's single remaining liberty, and a capture can
+    # never be suicide, so only quiet moves still need their own-group flood.
+    # Child States are built lazily by the returned make() closure: alpha-beta
+    # cuts off after searching only a few of the moves it orders, so most
+    # children's tuple allocations would be wasted work.
+    black, white = state
+    own, opp = (black, white) if player==BLACK else (white, black)
+    empty = FULL_MASK & ~(black | white)
+    opp_groups = [(g, expand(g) & empty) for g in find_groups(opp)]
+    children = {}
+    bb = empty
+    while bb:
+        bit = bb & -bb; bb ^= bit
+        captured = 0
+        for g, libs in opp_groups:
+            if libs == bit: captured |= g
+        if not captured:
+            group = group_mask(own | bit, bit)
+            if not (expand(group) & (empty ^ bit)): continue  # suicide
+        sq = bit.bit_length()-1
+        children[(sq//BOARD_SIZE, sq%BOARD_SIZE)] = captured
+
+    def make(move):
+        new_own = own | (1 << (move[0]*BOARD_SIZE + move[1]))
+        new_opp = opp ^ children[move]
+        return (State(new_own, new_opp) if player==BLACK
+                else State(new_opp, new_own))
+
+    return children, make
+
+def has_any_legal_move(state, player):
+    # Pass detection without building any child positions. Fast path: two
+    # adjacent empty squares mean either is trivially legal (no ko in this
+    # engine, so only suicide can veto an empty square). Otherwise every
+    # empty point is surrounded by stones and the capture/suicide analysis in
+    # expand_children's legality scan settles it.
+    empty = FULL_MASK & ~(state[0] | state[1])
+    if empty & expand(empty): return True
+    return bool(expand_children(state, player)[0])
+
+def order_children(children, tt_move=None, killers=(), mover=None):
+    moves = [tt_move] if tt_move in children else []
+    for k in killers:
+        if k and k != tt_move and k in children: moves.append(k)
+    caps, rest = [], []
+    for sq in CENTER_ORDER:
+        rc = (sq//BOARD_SIZE, sq%BOARD_SIZE)
+        if rc not in children or rc == tt_move or rc in killers: continue
+        (caps if children[rc] else rest).append(rc)
+    # stable sort: history score decides, centre-out order breaks ties
+    rest.sort(key=lambda m: -HISTORY.get((mover, m), 0))
+    return moves + caps + rest
+
+# Deadline handling for iterative deepening: minimax checks the clock every
+# 256 nodes and unwinds with SearchTimeout so a half-searched depth is never
+# used for the final answer.
+class SearchTimeout(Exception):
+    pass
+
+DEADLINE = math.inf
+NODES = 0
+
+# D4 symmetry folding: a 5x5 position has 8 equivalent images (4 rotations x
+# 2 reflections) with identical minimax values. Keying the transposition
+# table by the lexicographically smallest image (packed black<<25|white plus
+# a side-to-move bit) makes all 8 share one entry; stored best moves live in
+# the canonical orientation and are mapped back through the inverse
+# permutation on probe.
+_N = BOARD_SIZE - 1
+D4_PERMS = []
+for f in (lambda r, c: (r, c), lambda r, c: (c, _N-r), lambda r, c: (_N-r, _N-c),
+          lambda r, c: (_N-c, r), lambda r, c: (r, _N-c), lambda r, c: (c, r),
+          lambda r, c: (_N-r, c), lambda r, c: (_N-c, _N-r)):
+    D4_PERMS.append(tuple(f(sq//BOARD_SIZE, sq%BOARD_SIZE)[0]*BOARD_SIZE +
+                          f(sq//BOARD_SIZE, sq%BOARD_SIZE)[1]
+                          for sq in range(BOARD_SIZE*BOARD_SIZE)))
+INV_PERMS = [tuple(perm.index(sq) for sq in range(BOARD_SIZE*BOARD_SIZE)) for perm in D4_PERMS]
+
+def transform_bb(bb, perm):
+    out = 0
+    while bb:
+        bit = bb & -bb; bb ^= bit
+        out |= 1 << perm[bit.bit_length()-1]
+    return out
+
+def map_move(move, perm):
+    if move is None: return None
+    sq = perm[move[0]*BOARD_SIZE + move[1]]
+    return (sq//BOARD_SIZE, sq%BOARD_SIZE)
+
+def canonical_key(state, mover):
+    # (packed canonical position, index of the permutation that produced it)
+    best, best_k = None, 0
+    for k, perm in enumerate(D4_PERMS):
+        key = (transform_bb(state.black, perm) << BOARD_SIZE*BOARD_SIZE) | transform_bb(state.white, perm)
+        if best is None or key < best: best, best_k = key, k
+    return (best << 1) | mover, best_k
+
+# Transposition table: canonical position key -> (depth, flag, value, best_move).
+EXACT, LOWERBOUND, UPPERBOUND = 0, 1, 2
+TT = {}
+TT_MAX_ENTRIES = 2**18
+
+def tt_store(h, depth, value, move, alpha0, beta0):
+    flag = UPPERBOUND if value <= alpha0 else LOWERBOUND if value >= beta0 else EXACT
+    prev = TT.get(h)
+    if prev is None and len(TT) >= TT_MAX_ENTRIES: return
+    if prev is None or prev[0] <= depth: TT[h] = (depth, flag, value, move)
+
+def negamax(state, depth, alpha, beta, mover, ply=0):
+    # Negamax form: the returned value is always from mover's point of view
+    # (child values are negated), so one body replaces the twin max/min
+    # branches. Later siblings are probed with a null window first (principal
+    # variation search): proving "not better than the first move" is much
+    # cheaper than an exact value, and only a fail-high pays for a re-search.
+    global NODES
+    NODES += 1
+    if not NODES & 255 and time.time() > DEADLINE: raise SearchTimeout
+    if depth == 0: return heuristic(state, mover), None
+    h, perm_k = canonical_key(state, mover)
+    tt_move = None
+    entry = TT.get(h)
+    if entry:
+        e_depth, flag, value, e_move = entry
+        tt_move = map_move(e_move, INV_PERMS[perm_k])
+        if e_depth >= depth:
+            if flag == EXACT: return value, tt_move
+            if flag == LOWERBOUND: alpha = max(alpha, value)
+            else: beta = min(beta, value)
+            if beta <= alpha: return value, tt_move
+    alpha0, beta0 = alpha, beta
+    children, make = expand_children(state, mover)
+    if depth == 1 and children:
+        # Leaf fusion: a depth-1 child's evaluation is just the parent's score
+        # shifted by the placed stone plus its captures, so the best move is
+        # whichever captures most and no child State is ever materialized.
+        best_move = max(children, key=lambda m: children[m].bit_count())
+        val = heuristic(state, mover) + 1 + children[best_move].bit_count()
+        tt_store(h, 1, val, map_move(best_move, D4_PERMS[perm_k]), -math.inf, math.inf)
+        return val, best_move
+    killers = KILLERS[ply] if ply < len(KILLERS) else ()
+    moves = order_children(children, tt_move, killers, mover)
+    # LOAD_FAST beats LOAD_GLOBAL; at ~10^5 calls per search the dict probes
+    # for these names are measurable, so bind them once per node.
+    recurse, inf = negamax, math.inf
+    opp = mover ^ 1
+    best_val, best_move = -inf, None
+    for i, move in enumerate(moves):
+        child = make(move)
+        # scout only once alpha is finite: with alpha at -inf the null window
+        # (-alpha-1, -alpha) collapses to (inf, inf) - inf-1 is still inf -
+        # which returns garbage the re-search guard can never catch. That
+        # happens whenever the first move scores -inf (no legal reply down
+        # the line), so such moves fall back to the full window.
+        if i and alpha > -inf:
+            val, _ = recurse(child, depth-1, -alpha-1, -alpha, opp, ply+1)
+            val = -val
+            if alpha < val < beta:  # scout failed high: re-search full window
+                val, _ = recurse(child, depth-1, -beta, -alpha, opp, ply+1)
+                val = -val
+        else:
+            val, _ = recurse(child, depth-1, -beta, -alpha, opp, ply+1)
+            val = -val
+        if val > best_val: best_val, best_move = val, move
+        if val > alpha: alpha = val
+        if alpha >= beta:
+            record_killer(ply, move)
+            HISTORY[mover, move] = HISTORY.get((mover, move), 0) + depth*depth
+            break
+    tt_store(h, depth, best_val, map_move(best_move, D4_PERMS[perm_k]), alpha0, beta0)
+    return best_val, best_move
+
+# Root splitting: the candidate moves at the root are independent subtrees, so
+# the deeper iterations farm them out to worker processes. Each worker keeps
+# its own transposition table (the redundancy is the price of not sharing);
+# sibling alpha-beta pruning is lost at the root, so it only pays once the
+# subtrees are big enough to dwarf dispatch overhead.
+PARALLEL_MIN_DEPTH = 4
+_POOL = None
+
+def _pool():
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _POOL
+
+def _search_child(args):
+    state, depth, deadline = args
+    global DEADLINE
+    DEADLINE = deadline
+    try:
+        val, _ = negamax(state, depth, -math.inf, math.inf, WHITE, 1)
+        return -val  # White-relative -> Black-relative
+    except SearchTimeout:
+        return None
+    finally:
+        DEADLINE = math.inf
+
+def _parallel_root(state, d):
+    children, make = expand_children(state, BLACK)
+    h, perm_k = canonical_key(state, BLACK)
+    entry = TT.get(h)
+    moves = order_children(children, map_move(entry[3], INV_PERMS[perm_k]) if entry else None, (), BLACK)
+    if not moves: return None, None
+    args = [(make(m), d-1, DEADLINE) for m in moves]
+    best_val, best_move = None, None
+    for val, move in zip(_pool().map(_search_child, args), moves):
+        if val is None: raise SearchTimeout  # a worker hit the deadline
+        if best_val is None or val > best_val: best_val, best_move = val, move
+    tt_store(h, d, best_val, map_move(best_move, D4_PERMS[perm_k]), -math.inf, math.inf)
+    return best_val, best_move
+
+def root_search(state, depth, budget=2.0):
+    # Best move for Black via iterative deepening. Each completed depth seeds
+    # the transposition table (and killers) for the next, so depth k rarely
+    # costs what a cold depth-k search would; when the budget runs out the
+    # partially searched depth is discarded and the last completed answer
+    # returned, giving anytime behaviour instead of a half-scanned root.
+    # Returns (value, move, completed): completed is the deepest iteration
+    # that finished, so callers can tell a full-depth answer from one the
+    # deadline cut short.
+    global DEADLINE
+    clear_killers()
+    decay_history()
+    DEADLINE = time.time() + budget
+    best_val, best_move, completed = None, None, 0
+    try:
+        for d in range(1, depth+1):
+            if d >= PARALLEL_MIN_DEPTH and (os.cpu_count() or 1) > 1:
+                val, move = _parallel_root(state, d)
+            else:
+                # aspiration window: search around the previous depth's score
+                # instead of (-inf, inf). The stone-count heuristic is integral
+                # and stable between iterations, so +/-1 usually holds. A fail
+                # outside the window re-searches with that side fully open:
+                # scores are +/-inf when a line ends with no legal reply, so no
+                # additive widening step could ever catch them.
+                if best_val is None:
+                    lo, hi = -math.inf, math.inf
+                else:
+                    lo, hi = best_val - 1, best_val + 1
+                while True:
+                    val, move = negamax(state, d, lo, hi, BLACK)
+                    if val <= lo and lo > -math.inf: lo = -math.inf
+                    elif val >= hi and hi < math.inf: hi = math.inf
+                    else: break
+            completed = d
+            if move is not None:
+                best_val, best_move = val, move
+    except SearchTimeout:
+        pass
+    finally:
+        DEADLINE = math.inf
+    return best_val, best_move, completed
+
+# Warm the kernels (and numba's on-disk cache when present) with a tiny search
+# at import time so the first user-facing move doesn't pay compile cost.
+negamax(new_board(), 1, -math.inf, math.inf, BLACK)
+clear_killers()